@@ -14,47 +14,61 @@ self-consistent between the two files.
 If a match is unacceptable, it is not listed in the preferences.
 
 """
-from numpy import *
+import functools
+import sys
+from array import array
+from collections import deque
 
 class Person:
     """
     Represent a generic person
     """
 
-    def __init__(self, name: str, priorities: list):
+    def __init__(self, id: int, name: str, priorities: list):
         """
+        id is this person's position in their own file, used as an index
+
         name is a string which uniquely identifies this person
 
         priorities is a list of strings which specifies a ranking of all
           potential partners, from best to worst
         """
+        self.id = id
         self.name = name
         self.priorities = priorities
-        self.partner = None
+        self.partner = None  # the current partner's Person object
         self.rank = None
 
     def __repr__(self):
+        # name only, since the partner's repr would include this person again
+        partnerName = self.partner.name if self.partner is not None else None
         return 'Name is ' + self.name + '\n' + \
-            'Partner is currently ' + str(self.partner) + str(self.rank) + '\n' + \
+            'Partner is currently ' + str(partnerName) + str(self.rank) + '\n' + \
             'priority list is ' + str(self.priorities)
 
 
 class Proposer(Person):
-    def __init__(self, name: str, priorities: list):
+    def __init__(self, id: int, name: str, priorities: list, priorityIds: array):
         """
+        id is this person's position in their own file, used as an index
+
         name is a string which uniquely identifies this person
 
         priorities is a list of strings which specifies a ranking of all
           potential partners, from best to worst
+
+        priorityIds holds the ids of the same partners, in the same order
         """
-        Person.__init__(self, name, priorities)
+        Person.__init__(self, id, name, priorities)
+        self.priorityIds = priorityIds
+        self.priorityCount = len(priorities)
         self.proposalIndex = 0  # next person in our list to whom we might propose
 
     def nextProposal(self) -> int:
-        if self.proposalIndex >= len(self.priorities):
+        if self.proposalIndex >= self.priorityCount:
             #print('returned None')
             return None
-        goal: int = self.priorities[self.proposalIndex]
+        goal: int = self.priorityIds[self.proposalIndex]
         self.proposalIndex += 1
         return goal
 
@@ -64,81 +78,153 @@ class Proposer(Person):
     
 class Proposee(Person):
 
-    def __init__(self, name, priorities):
+    def __init__(self, id: int, name: str, priorities: list, ranking: array):
         """
+        id is this person's position in their own file, used as an index
+
         name is a string which uniquely identifies this person
 
         priorities is a list of strings which specifies a ranking of all
           potential partners, from best to worst
-        """
-        Person.__init__(self, name, priorities)
 
-        # now compute a reverse lookup for efficient candidate rating
-        self.ranking = {}
-        for rank in range(len(priorities)):
-            self.ranking[priorities[rank]] = rank
+        ranking is the reverse lookup of priorities used for efficient
+          candidate rating: an array of the rank of each potential partner,
+          indexed by their id, with anyone not listed given the unacceptable
+          rank len(priorities). It is shared between runs and never modified.
+        """
+        Person.__init__(self, id, name, priorities)
+        self.unacceptable = len(priorities)
+        self.ranking = ranking
+        self.partnerRank = None  # ranking of the current partner
 
-    def evaluateProposal(self, suitor: str) -> bool:
+    def evaluateProposal(self, suitor: Proposer) -> bool:
         """
-        Evaluates a proposal, though does not enact it.
+        Evaluates a proposal. The caller enacts an accepted proposal; this
+        only records the suitor's rank in rank and partnerRank.
 
-        suitor is the string identifier for the employer who is proposing
+        suitor is the employer who is proposing
 
         returns True if proposal should be accepted, False otherwise
         """
-        if suitor in self.ranking:
-            if self.partner == None or self.ranking[suitor] < self.ranking[self.partner]:
-                self.rank = self.ranking[suitor] + 1
+        rank = self.ranking[suitor.id]
+        if rank < self.unacceptable:
+            if self.partner is None or rank < self.partnerRank:
+                self.rank = rank + 1
+                self.partnerRank = rank
                 return True
             else:
                 return False
         return False
     
-    def evaluateGreedily(self, suitor: int) -> bool:
+    def evaluateGreedily(self, suitor: Proposer) -> bool:
         """
         Evaluates a proposal, though does not enact it.
 
-        Suitor is the string identifier for the proposer who is proposing
+        Suitor is the proposer who is proposing
 
         returns True if the proposee is not matched, False otherwise
         """
-        if suitor in self.ranking:
-            if self.partner == None:
-                self.rank = self.ranking[suitor] + 1
+        rank = self.ranking[suitor.id]
+        if rank < self.unacceptable:
+            if self.partner is None:
+                self.rank = rank + 1
                 return True
         return False
 
+@functools.lru_cache(maxsize=None)
 def parseFile(filename: str) -> list[str]:
     """
     Returns a list of (name,priority_list) pairs.
+
+    Results are cached by filename, since the same file is read for several
+    matchings; callers must not modify the returned lists.
     """
     people = []
-    # f = file(filename)
-    with open(filename) as f:
-        for line in f:
-            pieces = line.split(':')
-            name = pieces[0].strip()
-            if name:
-                priorities = pieces[1].strip().split(',')
-                for i in range(len(priorities)):
-                    priorities[i] = priorities[i].strip()
-                people.append((name, priorities))
-        f.close()
+    # read the whole file at once and split it in memory
+    with open(filename, 'rb', buffering=1 << 20) as f:
+        data = f.read().decode()
+    # names are interned so that looking them up in the name-to-id dicts
+    # matches keys by identity rather than comparing characters
+    for line in data.splitlines():
+        pieces = line.split(':')
+        name = sys.intern(pieces[0].strip())
+        if name:
+            priorities = [sys.intern(p.strip()) for p in pieces[1].split(',')]
+            people.append((name, priorities))
     return people
 
 
-def printPairings(proposerPref: dict, proposees: dict, proposer: str, proposee: str):
+def nameIds(people: list) -> dict:
+    """
+    Returns a dict mapping each name in a list of (name,priority_list) pairs
+    to its position in the list.
+    """
+    return {name: id for id, (name, _) in enumerate(people)}
+
+
+def loadInstance(fileTuple: tuple) -> tuple:
+    """
+    Parses the proposer and proposee files of fileTuple once, so that more
+    than one matching algorithm can be run on them.
+
+    Returns (proposerList, proposerPrefs, proposeeList, proposeeRankings):
+    the two parsed files, each proposer's priorities as an array of proposee
+    ids, and each proposee's ranking array (see Proposee). Matching never
+    modifies any of these.
+    """
+    proposerList = parseFile(fileTuple[0])
+    proposeeList = parseFile(fileTuple[1])
+    # people on each side are identified by their position in their file
+    proposerIds = nameIds(proposerList)
+    proposeeIds = nameIds(proposeeList)
+
+    proposerPrefs = [array('i', [proposeeIds[p] for p in priority]) for _, priority in proposerList]
+    # use the narrowest array type that holds every rank, so that for small
+    # files all the rankings together fit in a few cache lines
+    largest = max([len(proposerList)] + [len(priority) for _, priority in proposeeList])
+    typecode = 'B' if largest < 1 << 8 else 'H' if largest < 1 << 16 else 'i'
+    proposeeRankings = []
+    for _, priority in proposeeList:
+        ranking = array(typecode, [len(priority)]) * len(proposerList)
+        for rank, name in enumerate(priority):
+            # names missing from the proposer file (or '' from an empty
+            # list) keep the unacceptable rank
+            suitor = proposerIds.get(name)
+            if suitor is not None:
+                ranking[suitor] = rank
+        proposeeRankings.append(ranking)
+    return proposerList, proposerPrefs, proposeeList, proposeeRankings
+
+
+def buildPeople(instance: tuple) -> tuple:
+    """
+    Returns fresh (proposers, proposees) lists, indexed by id, holding the
+    state of a single matching run over an instance from loadInstance.
+    """
+    proposerList, proposerPrefs, proposeeList, proposeeRankings = instance
+    # each item in proposerList is a person and their priority list
+    proposerPref = [Proposer(id, person, priority, priorityIds)
+                    for id, ((person, priority), priorityIds) in enumerate(zip(proposerList, proposerPrefs))]
+
+    # initialize list of appllicants
+    proposees = [Proposee(id, person, priority, ranking)
+                 for id, ((person, priority), ranking) in enumerate(zip(proposeeList, proposeeRankings))]
+    return proposerPref, proposees
+
+
+def printPairings(proposerPref: list, proposees: list, proposer: str, proposee: str):
     totalUtility: int = 0
     proposerUtility: int = 0
     proposeeUtility: int = 0
     matchCt: int = 0
-    for prop in proposerPref.values():
+    for prop in proposerPref:
         # print(man)
-        if prop.partner:
-            print(prop.name, prop.rank, 'is paired with', str(prop.partner), proposees[str(prop.partner)].rank)
+        if prop.partner is not None:
+            partner = prop.partner
+            print(prop.name, prop.rank, 'is paired with', partner.name, partner.rank)
             proposerUtility += prop.rank
-            proposeeUtility += proposees[str(prop.partner)].rank
-            totalUtility += prop.rank + proposees[str(prop.partner)].rank
+            proposeeUtility += partner.rank
+            totalUtility += prop.rank + partner.rank
             matchCt = matchCt + 1
         else:
             print(prop.name, 'is NOT paired')
@@ -148,136 +234,93 @@ def printPairings(proposerPref: dict, proposees: dict, proposer: str, proposee:
     print(proposee, 'Utility', proposeeUtility)
     print()
 
-def doMatch(msg: str,fileTuple: tuple, proposer: str, proposee: str) -> void:
+def runMatching(msg: str, fileTuple: tuple, proposer: str, proposee: str, instance: tuple, evaluator) -> None:
     """
-    Performs Gale Shapley matching algorithm
+    Performs the proposal loop shared by doMatch and doGreedyMatch
 
     Args:
-        msg (string): Message for before output
-        fileTuple (tuple): Contains the files that are being worked with, as well as bool for verbose option
-        proposer (string): Used to print out who is proposing
-        proposee (string): Used to print out who is being proposed to
+        msg, fileTuple, proposer, proposee, instance: as for doMatch
+        evaluator (function): Proposee method deciding whether to accept a proposal,
+            called as evaluator(proposee, suitor)
     """
     print("\n\n"+msg+" working with files ", fileTuple)
-    proposerList = parseFile(fileTuple[0])
-    proposerPref = dict()
-    # each item in hr_list is a person and their priority list
-    for person, priority in proposerList:
-        # proposerPref[person[0]] = Proposer(person[0], person[1])
-        proposerPref[person] = Proposer(person, priority)
-    unmatched = list(proposerPref.keys())
-
-    # initialize dictionary of appllicants
-    proposeeList = parseFile(fileTuple[1])
-    proposees = dict()
-    # each item in proposeeList is a person and their priority list
-    for person, priority in proposeeList:
-        proposees[person] = Proposee(person, priority)
+    if instance is None:
+        instance = loadInstance(fileTuple)
+    proposerPref, proposees = buildPeople(instance)
+    unmatched = deque(proposerPref)
     verbose = fileTuple[2]
+    log = print if verbose else (lambda *args, **kwargs: None)
+    unmatchedHeader = f"Unmatched {proposer}s"
     ############################### the real algorithm ##################################
     while len(unmatched) > 0:
-        if verbose:
-            print("Unmatched " + proposer + "s", unmatched)
-        m = proposerPref[unmatched[0]]  # pick arbitrary unmatched employer
-        n = m.nextProposal()
-        if n is None:
+        m = unmatched[0]  # pick arbitrary unmatched employer
+        # m keeps proposing until accepted or out of options, without
+        # going back through the queue after each rejection
+        while m.partner is None:
             if verbose:
-                print('No more options ' + str(m))
-            unmatched.pop(0)
-            continue
-        who = proposees[n]  # identify highest-rank applicant to which
-        #    m has not yet proposed
-        if verbose: print(m.name, 'proposes to', who.name)
-
-        if who.evaluateProposal(m.name):
-            if verbose: print('  ', who.name, 'accepts the proposal')
-
-            if who.partner:
-                # previous partner is getting dumped
-                mOld = proposerPref[who.partner]
-                if verbose:
-                    print('  ', mOld.name, 'gets dumped')
-
-                mOld.partner = None
-                mOld.rank = 0
-                unmatched.append(mOld.name)
-
-            unmatched.pop(0)
-            who.partner = m.name
-            m.partner = who.name
-            m.rank = m.proposalIndex
-        else:
-            if verbose:
-                print('  ', who.name, 'rejects the proposal')
+                # only build the name list when it will be printed
+                print(unmatchedHeader, [prop.name for prop in unmatched])
+            n = m.nextProposal()
+            if n is None:
+                log('No more options', m)
+                break
+            who = proposees[n]  # identify highest-rank applicant to which
+            #    m has not yet proposed
+            log(m.name, 'proposes to', who.name)
+
+            if evaluator(who, m):
+                log('  ', who.name, 'accepts the proposal')
+
+                if who.partner is not None:
+                    # previous partner (never the case for greedy matching) is getting dumped
+                    mOld = who.partner
+                    log('  ', mOld.name, 'gets dumped')
+
+                    mOld.partner = None
+                    mOld.rank = 0
+                    unmatched.append(mOld)
+
+                who.partner = m
+                m.partner = who
+                m.rank = m.proposalIndex
+            else:
+                log('  ', who.name, 'rejects the proposal')
 
-        if verbose:
-            print("Tentative Pairings are as follows:")
-            printPairings(proposerPref, proposees, proposer, proposee)
+            if verbose:
+                print("Tentative Pairings are as follows:")
+                printPairings(proposerPref, proposees, proposer, proposee)
+        unmatched.popleft()
 
     # we should be done
     print("Final Pairings are as follows:")
     printPairings(proposerPref, proposees, proposer, proposee)
 
-def doGreedyMatch(msg: str, fileTuple: tuple, proposer: str, proposee: str) -> void:
+def doMatch(msg: str,fileTuple: tuple, proposer: str, proposee: str, instance: tuple = None) -> None:
     """
-    Performs Greedy matching algorithm
+    Performs Gale Shapley matching algorithm
 
     Args:
         msg (string): Message for before output
         fileTuple (tuple): Contains the files that are being worked with, as well as bool for verbose option
-            tuple should have the order [proposers, proposees, verbose]
         proposer (string): Used to print out who is proposing
         proposee (string): Used to print out who is being proposed to
+        instance (tuple): fileTuple already parsed by loadInstance; parsed here if not given
     """
-    print("\n\n"+msg+" working with files ", fileTuple)
-    proposerList = parseFile(fileTuple[0])
-    proposerPref = dict()
-    # each item in hr_list is a person and their priority list
-    for person, priority in proposerList:
-        # proposerPref[person[0]] = Proposer(person[0], person[1])
-        proposerPref[person] = Proposer(person, priority)
-    unmatched = list(proposerPref.keys())
-
-    # initialize dictionary of appllicants
-    proposeeList = parseFile(fileTuple[1])
-    proposees = dict()
-    # each item in proposeeList is a person and their priority list
-    for person, priority in proposeeList:
-        proposees[person] = Proposee(person, priority)
-    verbose = fileTuple[2]
-    ############################### the real algorithm ##################################
-    while len(unmatched) > 0:
-        if verbose:
-            print("Unmatched " + proposer + "s", unmatched)
-        m = proposerPref[unmatched[0]]  # pick arbitrary unmatched employer
-        n = m.nextProposal()
-        if n is None:
-            if verbose:
-                print('No more options ' + str(m))
-            unmatched.pop(0)
-            continue
-        who = proposees[n]  # identify highest-rank applicant to which
-        #    m has not yet proposed
-        if verbose: print(m.name, 'proposes to', who.name)
-
-        if who.evaluateGreedily(m.name):
-            if verbose: print('  ', who.name, 'accepts the proposal')
-
-            unmatched.pop(0)
-            who.partner = m.name
-            m.partner = who.name
-            m.rank = m.proposalIndex
-        else:
-            if verbose:
-                print('  ', who.name, 'rejects the proposal')
+    runMatching(msg, fileTuple, proposer, proposee, instance, Proposee.evaluateProposal)
 
-        if verbose:
-            print("Tentative Pairings are as follows:")
-            printPairings(proposerPref, proposees, proposer, proposee)
+def doGreedyMatch(msg: str, fileTuple: tuple, proposer: str, proposee: str, instance: tuple = None) -> None:
+    """
+    Performs Greedy matching algorithm
 
-    # we should be done
-    print("Final Pairings are as follows:")
-    printPairings(proposerPref, proposees, proposer, proposee)
+    Args:
+        msg (string): Message for before output
+        fileTuple (tuple): Contains the files that are being worked with, as well as bool for verbose option
+            tuple should have the order [proposers, proposees, verbose]
+        proposer (string): Used to print out who is proposing
+        proposee (string): Used to print out who is being proposed to
+        instance (tuple): fileTuple already parsed by loadInstance; parsed here if not given
+    """
+    runMatching(msg, fileTuple, proposer, proposee, instance, Proposee.evaluateGreedily)
 
 def runComparisons():
     # files = [("Employers0.txt", "Applicants0.txt", False),
@@ -288,28 +331,38 @@ def runComparisons():
             # ]
     
     # for fileTuple in files:
-    #     doMatch("Employers propose ", fileTuple, "Employer", "Applicant")
-    #     doGreedyMatch("Employers greedy propose ", fileTuple, "Employer", "Applicant")
+    #     instance = loadInstance(fileTuple)
+    #     doMatch("Employers propose ", fileTuple, "Employer", "Applicant", instance)
+    #     doGreedyMatch("Employers greedy propose ", fileTuple, "Employer", "Applicant", instance)
 
+    # each pair of files is parsed once and shared by both algorithms
     print("---Employers as Proposers---")
     print("Employers0.txt & Applicants0.txt\n")
-    doMatch("Gale Shapley", ("Employers0.txt", "Applicants0.txt", False), "Employer", "Applicant")
-    doGreedyMatch("Greedy", ("Employers0.txt", "Applicants0.txt", False), "Employer", "Applicant")
+    fileTuple = ("Employers0.txt", "Applicants0.txt", False)
+    instance = loadInstance(fileTuple)
+    doMatch("Gale Shapley", fileTuple, "Employer", "Applicant", instance)
+    doGreedyMatch("Greedy", fileTuple, "Employer", "Applicant", instance)
     print()
 
     print("Employers3.txt & Applicants3.txt\n")
-    doMatch("Gale Shapley", ("Employers3.txt", "Applicants3.txt", False), "Employer", "Applicant")
-    doGreedyMatch("Greedy", ("Employers3.txt", "Applicants3.txt", False), "Employer", "Applicant")
+    fileTuple = ("Employers3.txt", "Applicants3.txt", False)
+    instance = loadInstance(fileTuple)
+    doMatch("Gale Shapley", fileTuple, "Employer", "Applicant", instance)
+    doGreedyMatch("Greedy", fileTuple, "Employer", "Applicant", instance)
     print()
 
     print("---Applicants as Proposers---")
     print("Applicants0.txt & Employers0.txt")
-    doMatch("Gale Shapley", ("Applicants0.txt", "Employers0.txt", False), "Applicant", "Employer")
-    doGreedyMatch("Greedy", ("Applicants0.txt", "Employers0.txt", False), "Applicant", "Employer")
+    fileTuple = ("Applicants0.txt", "Employers0.txt", False)
+    instance = loadInstance(fileTuple)
+    doMatch("Gale Shapley", fileTuple, "Applicant", "Employer", instance)
+    doGreedyMatch("Greedy", fileTuple, "Applicant", "Employer", instance)
     print()
 
     print("Applicants3.txt & Employers3.txt")
-    doMatch("Gale Shapley", ("Applicants3.txt", "Employers3.txt", False), "Applicant", "Employer")
-    doGreedyMatch("Greedy", ("Applicants3.txt", "Employers3.txt", False), "Applicant", "Employer")
+    fileTuple = ("Applicants3.txt", "Employers3.txt", False)
+    instance = loadInstance(fileTuple)
+    doMatch("Gale Shapley", fileTuple, "Applicant", "Employer", instance)
+    doGreedyMatch("Greedy", fileTuple, "Applicant", "Employer", instance)
 
 runComparisons()
\ No newline at end of file